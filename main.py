@@ -1,10 +1,22 @@
 import os
 import sys
 import time
+import wave
+from collections import OrderedDict
 from configparser import ConfigParser, SectionProxy
-from ctypes import Structure, byref, c_uint, sizeof, windll
+from ctypes import (
+    POINTER,
+    WINFUNCTYPE,
+    Structure,
+    byref,
+    c_uint,
+    sizeof,
+    windll,
+    wintypes,
+)
+from dataclasses import dataclass
 from types import TracebackType
-from typing import Type
+from typing import Callable, Type
 
 import keyboard
 import psutil
@@ -14,21 +26,31 @@ import win32process
 from PyQt5.QtCore import (
     QCoreApplication,
     QEvent,
-    QMutex,
-    QMutexLocker,
     QObject,
     QRect,
     QSettings,
     QSize,
     Qt,
     QTimer,
+    pyqtSignal,
+)
+from PyQt5.QtGui import (
+    QColor,
+    QFont,
+    QFontDatabase,
+    QIcon,
+    QPainter,
+    QPaintEvent,
+    QPen,
+    QPixmap,
+    QRegion,
+    QResizeEvent,
+    QScreen,
 )
-from PyQt5.QtGui import QColor, QFont, QFontDatabase, QIcon, QKeyEvent, QPainter, QPen
 from PyQt5.QtWidgets import (
     QAction,
     QApplication,
     QCheckBox,
-    QDesktopWidget,
     QHBoxLayout,
     QInputDialog,
     QLabel,
@@ -38,6 +60,7 @@ from PyQt5.QtWidgets import (
     QPushButton,
     QWidget,
 )
+from simpleaudio._simpleaudio import SimpleaudioError
 
 
 def resource_path(relative_path) -> str:
@@ -52,6 +75,83 @@ alert_path: str = resource_path("alert.wav")
 font_path: str = resource_path("digital-7-mono.ttf")
 icon_path: str = resource_path("timericon.ico")
 
+HIDDEN_TIME: str = "--:--:--"
+MAX_TRACKED_SECONDS: int = 99 * 3600 + 59 * 60 + 59
+# The most one tick (1 s apart while tracking) can add, so time spent suspended
+# or with a stalled event loop isn't counted as work
+MAX_TICK_CREDIT_NS: int = 3_000_000_000
+
+EVENT_SYSTEM_FOREGROUND: int = 0x0003
+WINEVENT_OUTOFCONTEXT: int = 0x0000
+WinEventProcType = WINFUNCTYPE(
+    None,
+    wintypes.HANDLE,
+    wintypes.DWORD,
+    wintypes.HWND,
+    wintypes.LONG,
+    wintypes.LONG,
+    wintypes.DWORD,
+    wintypes.DWORD,
+)
+windll.user32.SetWinEventHook.argtypes = [
+    wintypes.DWORD,
+    wintypes.DWORD,
+    wintypes.HMODULE,
+    WinEventProcType,
+    wintypes.DWORD,
+    wintypes.DWORD,
+    wintypes.DWORD,
+]
+windll.user32.SetWinEventHook.restype = wintypes.HANDLE
+windll.user32.UnhookWinEvent.argtypes = [wintypes.HANDLE]
+windll.user32.UnhookWinEvent.restype = wintypes.BOOL
+
+
+# http://stackoverflow.com/questions/911856/detecting-idle-time-in-python
+class LASTINPUTINFO(Structure):
+    _fields_: list = [
+        ("cbSize", c_uint),
+        ("dwTime", c_uint),
+    ]
+
+
+# Idle time is checked every second, so the struct and the function
+# signatures are set up once instead of on every call
+last_input_info: LASTINPUTINFO = LASTINPUTINFO()
+last_input_info.cbSize = sizeof(last_input_info)
+windll.user32.GetLastInputInfo.argtypes = [POINTER(LASTINPUTINFO)]
+windll.user32.GetLastInputInfo.restype = wintypes.BOOL
+windll.kernel32.GetTickCount.restype = wintypes.DWORD
+get_last_input_info = windll.user32.GetLastInputInfo
+get_tick_count = windll.kernel32.GetTickCount
+
+
+def get_idle_milliseconds() -> int:
+    get_last_input_info(byref(last_input_info))
+    # Both counters are 32-bit milliseconds that wrap after ~49.7 days
+    return (get_tick_count() - last_input_info.dwTime) & 0xFFFFFFFF
+
+
+def load_digital_font() -> QFont:
+    """Load the bundled digital font, or fall back to the default family"""
+    digital_font_id: int = QFontDatabase.addApplicationFont(font_path)
+    font_families: list[str] = (
+        QFontDatabase.applicationFontFamilies(digital_font_id)
+        if digital_font_id != -1
+        else []
+    )
+    if not font_families:
+        print(f"Error: Could not load font {font_path}")
+        return QFont(QApplication.font().family(), 24)
+    return QFont(font_families[0], 24)
+
+
+@dataclass(frozen=True)
+class ActiveProgram:
+    pid: int
+    exe: str  # Normalised with os.path.normcase
+    name: str
+
 
 class BorderWindow(QWidget):
     def __init__(self, geometry: QRect) -> None:
@@ -59,45 +159,93 @@ class BorderWindow(QWidget):
         self.setGeometry(geometry)
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.Tool)
         self.setAttribute(Qt.WA_TranslucentBackground)
-        self.show()
+        # Nothing behind the border needs erasing, so let Qt merge paints freely
+        self.setAttribute(Qt.WA_NoSystemBackground, True)
+        self.setAttribute(Qt.WA_OpaquePaintEvent, False)
+        self.pen: QPen = QPen(QColor(240, 112, 112), 8)
+        self.border_rect: QRect = QRect()
+        self.border_region: QRegion = QRegion()
+        self.border_pixmap: QPixmap = QPixmap()
+
+    def resizeEvent(self, a0: QResizeEvent) -> None:
+        self.border_rect = QRect(0, 0, self.width(), self.height())
+        # Only the 8px band along the edges is ever painted
+        self.border_region = QRegion(self.border_rect).subtracted(
+            QRegion(self.border_rect.adjusted(8, 8, -8, -8))
+        )
 
-    def paintEvent(self, a0: QEvent) -> None:
+        # Render the border once so paint events are a plain blit
+        pixel_ratio: float = self.devicePixelRatioF()
+        self.border_pixmap = QPixmap(self.size() * pixel_ratio)
+        self.border_pixmap.setDevicePixelRatio(pixel_ratio)
+        self.border_pixmap.fill(Qt.transparent)
+        painter: QPainter = QPainter()
+        painter.begin(self.border_pixmap)
+        self.drawBorder(painter)
+        painter.end()
+
+    def paintEvent(self, a0: QPaintEvent) -> None:
         event = a0
+        if not event.region().intersects(self.border_region):
+            return
         painter: QPainter = QPainter()
         painter.begin(self)
-        self.drawBorder(painter)
+        painter.drawPixmap(0, 0, self.border_pixmap)
         painter.end()
 
     def drawBorder(self, painter: QPainter) -> None:
-        color: QColor = QColor(240, 112, 112)
-        painter.setPen(QPen(color, 8))  # Set pen color and width
-        painter.drawRect(0, 0, self.width(), self.height())  # Draw border rectangle
+        painter.setPen(self.pen)
+        painter.drawRect(self.border_rect)
 
 
 class BorderWindows:
     def __init__(self) -> None:
-        self.border_windows: list = []
+        self.border_windows: dict[QScreen, BorderWindow] = {}
         self.is_visible: bool = False
+        self.screens_enumerated: bool = False
+
+        # Keep one window per monitor as monitors come and go, instead of
+        # enumerating the screens again. Connected once, here, so add_screen
+        # never runs twice for the same screen
+        app: QApplication = QApplication.instance()
+        app.screenAdded.connect(self.add_screen)
+        app.screenRemoved.connect(self.remove_screen)
 
     def create_border_windows(self) -> None:
-        desktop: QDesktopWidget = QApplication.desktop()
-        if desktop is not None:
-            for i in range(desktop.screenCount()):
-                geometry: QRect = desktop.screenGeometry(i)
-                border_window: BorderWindow = BorderWindow(geometry)
-                self.border_windows.append(border_window)
-        else:
-            print("Error: Desktop object not available")
+        self.screens_enumerated = True
+        for screen in QApplication.instance().screens():
+            self.add_screen(screen)
+
+    def add_screen(self, screen: QScreen) -> None:
+        # Windows for new screens are only needed once the rest exist
+        if not self.screens_enumerated or screen in self.border_windows:
+            return
+        border_window: BorderWindow = BorderWindow(screen.geometry())
+        screen.geometryChanged.connect(border_window.setGeometry)
+        self.border_windows[screen] = border_window
+        if self.is_visible:
+            border_window.show()
+
+    def remove_screen(self, screen: QScreen) -> None:
+        border_window: BorderWindow | None = self.border_windows.pop(screen, None)
+        if border_window is not None:
+            border_window.hide()
+            border_window.deleteLater()
 
     def hide(self) -> None:
-        for border_window in self.border_windows:
+        if not self.is_visible:
+            return
+        for border_window in self.border_windows.values():
             border_window.hide()
         self.is_visible = False
 
     def show(self) -> None:
-        if not self.border_windows:
+        # Called every second while idle, so only the first call does anything
+        if self.is_visible:
+            return
+        if not self.screens_enumerated:
             self.create_border_windows()
-        for border_window in self.border_windows:
+        for border_window in self.border_windows.values():
             border_window.show()
         self.is_visible = True
 
@@ -106,9 +254,21 @@ class BorderWindows:
 
 
 class MainWindow(QMainWindow):
+    # Hotkeys fire on the keyboard package's listener thread, so they are
+    # forwarded to the GUI thread through these (queued) signals
+    add_program_requested: pyqtSignal = pyqtSignal()
+    remove_program_requested: pyqtSignal = pyqtSignal()
+
     def __init__(self) -> None:
         super().__init__()
-        self.lock: QMutex = QMutex()
+        # Created first since restoring the geometry can already send a
+        # WindowStateChange; started (and stopped) by update_timer_state
+        self.timer: QTimer = QTimer(self)
+        # A wall clock for humans doesn't need a precise (higher resolution)
+        # system timer
+        self.timer.setTimerType(Qt.CoarseTimer)
+        self.timer.timeout.connect(self.update_time)
+        self.active_program_tracked: bool = False
         self.settings: QSettings = QSettings("qsettings.ini", QSettings.IniFormat)
 
         self.window_size: QSize = QSize(205, 39)
@@ -129,7 +289,12 @@ class MainWindow(QMainWindow):
 
         # Delimeters set to only "=" becuase
         # ":" is used for saving the path of tracked programs
-        self.config: ConfigParser = ConfigParser(delimiters=("=",))
+        # Interpolation is off since paths may contain "%"
+        self.config: ConfigParser = ConfigParser(delimiters=("=",), interpolation=None)
+        # Paths are case-insensitive on Windows, so store program keys in the
+        # same normalised form as ActiveProgram.exe (this matches the old
+        # lower-casing for existing settings files)
+        self.config.optionxform = os.path.normcase
         self.config.read("settings.ini")
         if "OPTIONS" not in self.config:
             self.config["OPTIONS"] = {}
@@ -137,11 +302,22 @@ class MainWindow(QMainWindow):
             self.config["PROGRAMS"] = {}
 
         options: SectionProxy = self.config["OPTIONS"]
+        # Option changes are written out 2s after the last one rather than
+        # on every change (and always on close, through save_data)
+        self.config_dirty: bool = False
+        self.config_flush_timer: QTimer = QTimer(self)
+        self.config_flush_timer.setSingleShot(True)
+        self.config_flush_timer.setInterval(2000)
+        self.config_flush_timer.timeout.connect(self.flush_config_if_dirty)
         self.tracked_programs: SectionProxy = self.config["PROGRAMS"]
+        # The section is only needed for saving; membership is checked every
+        # second, so keep the normalised paths in a plain set as well
+        self.tracked_exes: set[str] = set(self.tracked_programs)
 
         self.active_color = options.get("active_color", "#B0FFFF")
         self.inactive_color = options.get("inactive_color", "#F07070")
         self.idle_timeout: int = options.getint("idle_timeout", 30)
+        self.idle_timeout_ms: int = self.idle_timeout * 1000
         self.goal_time: int = options.getint("goal_time", 8)
         self.goal_time_reached = False
         self.previous_time: str = options.get("previous_time", "00:00:00")
@@ -151,53 +327,93 @@ class MainWindow(QMainWindow):
         )
         self.hide_time: bool = options.getboolean("hide_time", False)
 
-        add_program_hotkey: str = options.get("add_program_hotkey", "ctrl+win+alt+a")
-        remove_program_hotkey: str = options.get(
-            "remove_program_hotkey", "ctrl+win+alt+r"
+        self.add_program_requested.connect(self.add_program, Qt.QueuedConnection)
+        self.remove_program_requested.connect(
+            self.remove_program, Qt.QueuedConnection
         )
-        keyboard.add_hotkey(add_program_hotkey, self.add_program)
-        keyboard.add_hotkey(remove_program_hotkey, self.remove_program)
 
         self.seconds_since_idle_timeout: int = 0
+        # Loaded on the first play, since the sound is off by default
+        self.alert_wave: simpleaudio.WaveObject | None = None
+        # Cleared when playback fails, until the sound is turned on again
+        self.sound_ok: bool = True
         self.border_windows: BorderWindows = BorderWindows()
-        self.wait_to_add_program: bool = False
-        self.wait_to_remove_program: bool = False
+        # Created by get_int_input and show_alert when first needed
+        self.int_input_dialog: QInputDialog | None = None
+        self.alert: QMessageBox | None = None
+        # add_program or remove_program, run on the next click elsewhere
+        self.pending_action: Callable[[], None] | None = None
+        # Least recently used first, keyed by (window handle, PID)
+        self.program_cache: OrderedDict[tuple[int, int], ActiveProgram] = (
+            OrderedDict()
+        )
+
+        # Only look up the foreground program when it actually changes,
+        # so the per-second tick doesn't have to query Windows and psutil
+        self.active_program: ActiveProgram | None = self.get_active_program()
+        self.update_active_program_tracked()
+        # Keep a reference to the callback so it isn't garbage collected
+        self.foreground_hook_proc = WinEventProcType(self.foreground_changed)
+        self.foreground_hook: int | None = windll.user32.SetWinEventHook(
+            EVENT_SYSTEM_FOREGROUND,
+            EVENT_SYSTEM_FOREGROUND,
+            None,
+            self.foreground_hook_proc,
+            0,
+            0,
+            WINEVENT_OUTOFCONTEXT,
+        )
+        # Fallback in case a foreground change event is missed
+        foreground_poll_timer: QTimer = QTimer(self)
+        foreground_poll_timer.setTimerType(Qt.CoarseTimer)
+        foreground_poll_timer.timeout.connect(self.refresh_active_program)
+        foreground_poll_timer.start(10000)
 
         self.setWindowTitle("WORK WORK")
         self.setWindowIcon(QIcon(icon_path))
         self.setObjectName("MainWindow")
-        self.change_background_color(self.inactive_color)
-        self.hours: int = 0
-        self.minutes: int = 0
-        self.seconds: int = 0
-        timer: QTimer = QTimer(self)
-        timer.timeout.connect(self.update_time)
-        timer.start(1000)
-
-        self.current_time: str = "--:--:--" if self.hide_time else "00:00:00"
-        self.label: QLabel = QLabel(self.current_time, self)
-        self.label.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
-        digital_font_id: int = QFontDatabase.addApplicationFont(font_path)
-        font_families: list[str] = QFontDatabase.applicationFontFamilies(
-            digital_font_id
-        )
-        self.label.setFont(QFont(font_families[0], 24))
+        # One style sheet for the whole window, parsed once; the background
+        # follows the "active" property, which only needs a re-polish
+        self.background_color: str = self.inactive_color
+        self.setProperty("active", False)
+        self.setStyleSheet(
+            f"""MainWindow[active="false"] {{
+                background-color: {self.inactive_color};
+            }}
 
-        self.menu: QMenu = QMenu()
-        self.menu.aboutToShow.connect(self.update_menu)
-        menu_button: QPushButton = QPushButton("MENU")
-        menu_button.setStyleSheet(
-            f"""QPushButton {{
+            MainWindow[active="true"] {{
+                background-color: {self.active_color};
+            }}
+
+            QPushButton#menuButton {{
                 background-color: white;
                 padding: 3px 6px;
                 border: 1px solid black;
             }}
 
-            QPushButton::menu-indicator {{
+            QPushButton#menuButton::menu-indicator {{
                 width: 0;
             }}
             """
         )
+        # Time tracked so far, plus the monotonic time it was last credited
+        # (None while not tracking). Deriving the time from these keeps it
+        # exact even when timer ticks are late or coalesced
+        self.tracked_ns: int = 0
+        self.last_credit_ns: int | None = None
+
+        self.current_time: str = "00:00:00"
+        # Mirrors the label's text so the per-tick check stays in Python
+        self.label_text: str = HIDDEN_TIME if self.hide_time else self.current_time
+        self.label: QLabel = QLabel(self.label_text, self)
+        self.label.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        self.label.setFont(load_digital_font())
+
+        self.menu: QMenu = QMenu()
+        self.build_menu()
+        self.menu.aboutToShow.connect(self.update_menu)
+        menu_button: QPushButton = QPushButton("MENU")
+        menu_button.setObjectName("menuButton")
         menu_button.setMenu(self.menu)
 
         checkbox: QCheckBox = QCheckBox("")
@@ -221,11 +437,41 @@ class MainWindow(QMainWindow):
 
         self.getting_active_program = False
 
+        # Runs once the event loop has painted the window
+        QTimer.singleShot(0, self.deferred_init)
+
+    def deferred_init(self) -> None:
+        # Startup work the first paint doesn't depend on
+        options: SectionProxy = self.config["OPTIONS"]
+        add_program_hotkey: str = options.get("add_program_hotkey", "ctrl+win+alt+a")
+        remove_program_hotkey: str = options.get(
+            "remove_program_hotkey", "ctrl+win+alt+r"
+        )
+        keyboard.add_hotkey(add_program_hotkey, self.add_program_requested.emit)
+        keyboard.add_hotkey(remove_program_hotkey, self.remove_program_requested.emit)
+
     def save_data(self) -> None:
         self.settings.setValue("geometry", self.saveGeometry())
-        with open("settings.ini", "w") as configfile:
-            self.config["OPTIONS"]["previous_time"] = self.current_time
+        self.config["OPTIONS"]["previous_time"] = self.current_time
+        self.write_config()
+
+    def write_config(self) -> None:
+        # Write a temporary file and swap it in, so a crash mid-write can't
+        # leave a truncated settings.ini behind
+        with open("settings.ini.tmp", "w") as configfile:
             self.config.write(configfile)
+        os.replace("settings.ini.tmp", "settings.ini")
+        self.config_dirty = False
+        self.config_flush_timer.stop()
+
+    def mark_config_dirty(self) -> None:
+        self.config_dirty = True
+        # Restarting the timer coalesces a burst of changes into one write
+        self.config_flush_timer.start()
+
+    def flush_config_if_dirty(self) -> None:
+        if self.config_dirty:
+            self.write_config()
 
     def handle_exception(
         self,
@@ -238,112 +484,213 @@ class MainWindow(QMainWindow):
         sys.exit(0)
 
     def change_background_color(self, color: str) -> None:
-        self.setStyleSheet(f"MainWindow {{ background-color: {color}; }}")
-
-    def get_active_program(self) -> psutil.Process | None:
-        MAX_RETRIES: int = 3
-        for attempt in range(MAX_RETRIES):
-            try:
-                active_window_handle: int = win32gui.GetForegroundWindow()
-                _, process_id = win32process.GetWindowThreadProcessId(
-                    active_window_handle
+        if color == self.background_color:
+            return
+        self.background_color = color
+        # Re-polish just this window instead of setting a new style sheet,
+        # which would be parsed again and re-polish every child widget
+        self.setProperty("active", color == self.active_color)
+        self.style().unpolish(self)
+        self.style().polish(self)
+        self.update()
+
+    def get_active_program(self) -> ActiveProgram | None:
+        PROGRAM_CACHE_SIZE: int = 64
+        try:
+            active_window_handle: int = win32gui.GetForegroundWindow()
+            _, process_id = win32process.GetWindowThreadProcessId(
+                active_window_handle
+            )
+            if process_id <= 0:
+                print(f"Invalid PID: {process_id}")
+                return None
+
+            # A window belongs to the same process for its whole life, so a
+            # window seen before doesn't need another process lookup. The PID
+            # is part of the key in case a closed window's handle is reused
+            cache_key: tuple[int, int] = (active_window_handle, process_id)
+            cached: ActiveProgram | None = self.program_cache.get(cache_key)
+            if cached is not None:
+                self.program_cache.move_to_end(cache_key)
+                return cached
+
+            program: psutil.Process = psutil.Process(process_id)
+            with program.oneshot():
+                active_program: ActiveProgram = ActiveProgram(
+                    process_id,
+                    os.path.normcase(program.exe()),
+                    program.name(),
                 )
-                if process_id > 0:
-                    program: psutil.Process = psutil.Process(process_id)
-                    return program
-                else:
-                    print(f"Invalid PID (attempt {attempt+1}): {process_id}")
-            except (
-                psutil.NoSuchProcess,
-                psutil.AccessDenied,
-                OSError,
-                ValueError,
-            ) as e:
-                print(f"Error getting active program (attempt {attempt+1}): {e}")
-
-            time.sleep(0.2)
 
-        return None
+            self.program_cache[cache_key] = active_program
+            if len(self.program_cache) > PROGRAM_CACHE_SIZE:
+                self.program_cache.popitem(last=False)
+            return active_program
+        except (
+            psutil.NoSuchProcess,
+            psutil.AccessDenied,
+            OSError,
+            ValueError,
+        ) as e:
+            print(f"Error getting active program: {e}")
+            return None
+
+    def foreground_changed(
+        self,
+        hook: int,
+        event: int,
+        window_handle: int,
+        object_id: int,
+        child_id: int,
+        event_thread: int,
+        event_time: int,
+    ) -> None:
+        self.refresh_active_program()
+
+    def refresh_active_program(self, attempt: int = 1) -> None:
+        MAX_ATTEMPTS: int = 3
+        self.active_program = self.get_active_program()
+        self.update_active_program_tracked()
+
+        # Lookups can fail briefly while a program starts or exits, so retry
+        # later instead of sleeping on the GUI thread
+        if self.active_program is None and attempt < MAX_ATTEMPTS:
+            QTimer.singleShot(200, lambda: self.refresh_active_program(attempt + 1))
+
+    def update_active_program_tracked(self) -> None:
+        was_tracked: bool = self.active_program_tracked
+        self.active_program_tracked = (
+            self.active_program is not None
+            and self.active_program.exe in self.tracked_exes
+        )
+        self.update_timer_state()
+
+        # Start or stop tracking the moment focus changes or the program is
+        # added/removed, rather than on the next tick (which is slow away
+        # from tracked programs). Queued, since __init__ gets here before
+        # the label and window colours exist. The label is left alone so
+        # status texts like "added" stay up until the next regular tick
+        if was_tracked != self.active_program_tracked:
+            QTimer.singleShot(0, lambda: self.update_time(refresh_label=False))
+
+    def update_timer_state(self) -> None:
+        ACTIVE_INTERVAL: int = 1000
+        INACTIVE_INTERVAL: int = 5000
+
+        if self.active_program_tracked:
+            interval: int = ACTIVE_INTERVAL
+        elif self.isMinimized():
+            # Nothing to count or show, so don't wake up at all
+            self.timer.stop()
+            return
+        else:
+            # Nothing is counted away from tracked programs; the tick only
+            # refreshes the title and label, so it can run less often
+            interval = INACTIVE_INTERVAL
+
+        # Restarting the timer resets its phase, so only do it on changes
+        if not self.timer.isActive() or self.timer.interval() != interval:
+            self.timer.start(interval)
+
+    def set_window_title(self, title: str) -> None:
+        if title != self.windowTitle():
+            self.setWindowTitle(title)
 
-    def update_label_safe(self, text: str):
-        QTimer.singleShot(0, lambda: self.label.setText(text))
+    def set_label_text(self, text: str) -> None:
+        self.label_text = text
+        self.label.setText(text)
 
     def update_time_display(self) -> None:
-        if self.hide_time:
-            self.current_time = "--:--:--"
-        else:
-            self.current_time = f"{self.hours:02}:{self.minutes:02}:{self.seconds:02}"
-        self.update_label_safe(self.current_time)
-
-    def update_time(self) -> None:
-        with QMutexLocker(self.lock):
-            active_program: psutil.Process | None = self.get_active_program()
-            active_program_path: str | None = (
-                active_program.exe() if active_program else None
-            )
+        # Always kept up to date, even when hidden, so save_data stores the
+        # real time rather than the mask
+        hours, remainder = divmod(self.get_tracked_seconds(), 3600)
+        minutes, seconds = divmod(remainder, 60)
+        self.current_time = f"{hours:02}:{minutes:02}:{seconds:02}"
+        if self.isMinimized():
+            # Nothing is visible; the label is refreshed on restore
+            return
+        text: str = HIDDEN_TIME if self.hide_time else self.current_time
+        # Most ticks don't change the text (always so while the time is
+        # hidden), so avoid scheduling a repaint
+        if text != self.label_text:
+            self.set_label_text(text)
+
+    def get_uncredited_ns(self, now_ns: int) -> int:
+        if self.last_credit_ns is None:
+            return 0
+        return min(now_ns - self.last_credit_ns, MAX_TICK_CREDIT_NS)
+
+    def get_tracked_seconds(self) -> int:
+        tracked_ns: int = self.tracked_ns + self.get_uncredited_ns(
+            time.perf_counter_ns()
+        )
+        # Rounded, since a coarse timer may fire slightly before the second
+        return min((tracked_ns + 500_000_000) // 1_000_000_000, MAX_TRACKED_SECONDS)
+
+    def set_tracked_seconds(self, seconds: int) -> None:
+        self.tracked_ns = seconds * 1_000_000_000
+        if self.last_credit_ns is not None:
+            self.last_credit_ns = time.perf_counter_ns()
+
+    def update_goal_time_reached(self) -> None:
+        # After the time or goal changes, only alert for a goal still ahead
+        self.goal_time_reached = self.get_tracked_seconds() >= self.goal_time * 3600
+
+    def credit_tracked_time(self) -> None:
+        # Called on every tracked tick, so each gap is capped separately
+        now_ns: int = time.perf_counter_ns()
+        self.tracked_ns += self.get_uncredited_ns(now_ns)
+        self.last_credit_ns = now_ns
+
+    def stop_tracking(self) -> None:
+        if self.last_credit_ns is not None:
+            self.credit_tracked_time()
+            self.last_credit_ns = None
+
+    def update_time(self, refresh_label: bool = True) -> None:
+        if self.active_program_tracked and self.is_idle() is False:
+            self.change_background_color(self.active_color)
+            self.set_window_title("KEEP WORKING")
+
+            if self.last_credit_ns is None:
+                self.last_credit_ns = time.perf_counter_ns()
+            else:
+                self.credit_tracked_time()
 
-            if (
-                active_program_path is not None
-                and active_program_path in self.tracked_programs
-                and self.is_idle() is False
-            ):
-                self.change_background_color(self.active_color)
-                self.setWindowTitle("KEEP WORKING")
-
-                if self.seconds < 59:
-                    self.seconds += 1
-                elif self.minutes < 59:
-                    self.minutes += 1
-                    self.seconds = 0
-                elif self.hours < 99:
-                    self.hours += 1
-                    self.minutes = 0
-                    self.seconds = 0
-
-                if (
-                    self.hours == self.goal_time
-                    and self.minutes == 0
-                    and self.seconds <= 2
-                    and self.goal_time_reached == False
-                ):
-                    self.show_alert("Work goal reached!")
-                    self.goal_time_reached = True
-
-            elif self.windowTitle() != "WORK WORK":
+            seconds_past_goal: int = self.get_tracked_seconds() - self.goal_time * 3600
+            if seconds_past_goal >= 0 and not self.goal_time_reached:
+                self.show_alert("Work goal reached!")
+                self.goal_time_reached = True
+
+        else:
+            self.stop_tracking()
+            if self.windowTitle() != "WORK WORK":
                 self.change_background_color(self.inactive_color)
-                self.setWindowTitle("BACK TO WORK")
+                self.set_window_title("BACK TO WORK")
 
-            if not self.wait_to_add_program and not self.wait_to_remove_program:
-                self.update_time_display()
-
-    def update_menu(self) -> None:
-        self.menu.clear()
+        if refresh_label and self.pending_action is None:
+            self.update_time_display()
 
+    def build_menu(self) -> None:
+        # The actions are created once; update_menu only refreshes the labels
+        # that show current settings
         add_program_item: QAction = self.menu.addAction("Add program")
         add_program_item.triggered.connect(self.add_program_mouse)
         remove_program_item: QAction = self.menu.addAction("Remove program")
         remove_program_item.triggered.connect(self.remove_program_mouse)
         self.menu.addSeparator()
 
-        idle_timeout_item: QAction = self.menu.addAction(
-            f"Timeout: {self.idle_timeout}"
-        )
-        idle_timeout_item.triggered.connect(self.set_idle_timeout)
+        self.idle_timeout_item: QAction = self.menu.addAction("")
+        self.idle_timeout_item.triggered.connect(self.set_idle_timeout)
 
-        goal_time_item: QAction = self.menu.addAction(f"Goal time: {self.goal_time} hours")
-        goal_time_item.triggered.connect(self.set_goal_time)
+        self.goal_time_item: QAction = self.menu.addAction("")
+        self.goal_time_item.triggered.connect(self.set_goal_time)
 
-        sound_state: str = "on" if self.play_sound_on_idle else "off"
-        toggle_idle_sound_item: QAction = self.menu.addAction(
-            f"Idle indicator sound: {sound_state}"
-        )
-        toggle_idle_sound_item.triggered.connect(self.toggle_idle_sound)
+        self.toggle_idle_sound_item: QAction = self.menu.addAction("")
+        self.toggle_idle_sound_item.triggered.connect(self.toggle_idle_sound)
 
-        border_state: str = "on" if self.show_border_on_idle else "off"
-        toggle_idle_border_item: QAction = self.menu.addAction(
-            f"Idle indicator border: {border_state}"
-        )
-        toggle_idle_border_item.triggered.connect(self.toggle_idle_border)
+        self.toggle_idle_border_item: QAction = self.menu.addAction("")
+        self.toggle_idle_border_item.triggered.connect(self.toggle_idle_border)
 
         self.menu.addSeparator()
 
@@ -352,156 +699,190 @@ class MainWindow(QMainWindow):
         reset_time_item: QAction = self.menu.addAction("Reset time")
         reset_time_item.triggered.connect(self.reset_time)
 
+    def update_menu(self) -> None:
+        self.idle_timeout_item.setText(f"Timeout: {self.idle_timeout}")
+        self.goal_time_item.setText(f"Goal time: {self.goal_time} hours")
+
+        sound_state: str = "on" if self.play_sound_on_idle else "off"
+        self.toggle_idle_sound_item.setText(f"Idle indicator sound: {sound_state}")
+
+        border_state: str = "on" if self.show_border_on_idle else "off"
+        self.toggle_idle_border_item.setText(f"Idle indicator border: {border_state}")
+
     def toggle_idle_border(self) -> None:
         self.show_border_on_idle: bool = not self.show_border_on_idle
         self.config["OPTIONS"]["show_border_on_idle"] = str(self.show_border_on_idle)
+        self.mark_config_dirty()
 
         if self.show_border_on_idle:
-            self.label.setText("brdr on")
+            self.set_label_text("brdr on")
         else:
-            self.label.setText("brdr off")
+            self.border_windows.hide()
+            self.set_label_text("brdr off")
 
     def is_idle(self) -> bool:
-        # http://stackoverflow.com/questions/911856/detecting-idle-time-in-python
-        class LASTINPUTINFO(Structure):
-            _fields_: list = [
-                ("cbSize", c_uint),
-                ("dwTime", c_uint),
-            ]
-
-        def get_idle_duration() -> float:
-            lastInputInfo: LASTINPUTINFO = LASTINPUTINFO()
-            lastInputInfo.cbSize = sizeof(lastInputInfo)
-            windll.user32.GetLastInputInfo(byref(lastInputInfo))
-            millis: float = windll.kernel32.GetTickCount() - lastInputInfo.dwTime
-            return millis / 1000
-
-        # ----------------------------------------------------------------------
-
-        if get_idle_duration() >= self.idle_timeout:
+        if get_idle_milliseconds() >= self.idle_timeout_ms:
             if self.show_border_on_idle:
                 self.border_windows.show()
 
-            if self.play_sound_on_idle and self.seconds_since_idle_timeout == 0:
-                wave_obj: simpleaudio.WaveObject = (
-                    simpleaudio.WaveObject.from_wave_file(alert_path)
-                )
-                wave_obj.play()
+            if (
+                self.play_sound_on_idle
+                and self.seconds_since_idle_timeout == 0
+                and self.sound_ok
+            ):
+                self.play_idle_sound()
                 self.seconds_since_idle_timeout += 1
 
             return True
         else:
-            if self.border_windows.isVisible():
-                self.border_windows.hide()
+            self.border_windows.hide()
             self.seconds_since_idle_timeout = 0
             return False
 
-    def set_idle_timeout(self) -> None:
-        dialog_box: QInputDialog = QInputDialog(self)
+    def play_idle_sound(self) -> None:
+        try:
+            if self.alert_wave is None:
+                self.alert_wave = simpleaudio.WaveObject.from_wave_file(alert_path)
+            self.alert_wave.play()
+        except (OSError, EOFError, wave.Error, SimpleaudioError, ValueError) as e:
+            # e.g. a missing alert.wav or no audio device; don't retry on
+            # every idle period
+            print(f"Error playing idle sound, sound disabled: {e}")
+            self.sound_ok = False
+
+    def get_int_input(
+        self, title: str, label: str, value: int, maximum: int
+    ) -> int | None:
+        # Both settings dialogs share one input dialog, built on first use
+        if self.int_input_dialog is None:
+            dialog_box: QInputDialog = QInputDialog(self)
+
+            # Remove question mark from the title bar
+            dialog_box.setWindowFlags(
+                dialog_box.windowFlags() & ~Qt.WindowContextHelpButtonHint
+                | Qt.WindowCloseButtonHint
+            )
 
-        # Remove question mark from the title bar
-        dialog_box.setWindowFlags(
-            dialog_box.windowFlags() & ~Qt.WindowContextHelpButtonHint
-            | Qt.WindowCloseButtonHint
-        )
+            dialog_box.setInputMode(QInputDialog.IntInput)
+            self.int_input_dialog = dialog_box
 
-        dialog_box.setInputMode(QInputDialog.IntInput)
-        dialog_box.setIntRange(1, 99999)
-        dialog_box.setIntValue(self.idle_timeout)
-        dialog_box.setLabelText("Ender new idle timeout:")
-        dialog_box.setWindowTitle("Idle Setting")
+        dialog_box = self.int_input_dialog
+        dialog_box.setIntRange(1, maximum)
+        dialog_box.setIntValue(value)
+        dialog_box.setLabelText(label)
+        dialog_box.setWindowTitle(title)
 
         if dialog_box.exec() == QInputDialog.Accepted:
-            new_timeout: int = dialog_box.intValue()
+            return dialog_box.intValue()
+        return None
+
+    def set_idle_timeout(self) -> None:
+        new_timeout: int | None = self.get_int_input(
+            "Idle Setting", "Ender new idle timeout:", self.idle_timeout, 99999
+        )
+        if new_timeout is not None:
             self.idle_timeout: int = new_timeout
+            self.idle_timeout_ms = new_timeout * 1000
             self.config["OPTIONS"]["idle_timeout"] = str(new_timeout)
+            self.mark_config_dirty()
 
     def set_goal_time(self) -> None:
-        dialog_box: QInputDialog = QInputDialog(self)
-
-        # Remove question mark from the title bar
-        dialog_box.setWindowFlags(
-            dialog_box.windowFlags() & ~Qt.WindowContextHelpButtonHint
-            | Qt.WindowCloseButtonHint
+        new_goal_time: int | None = self.get_int_input(
+            "Goal Hours Setting", "Enter goal hours:", self.goal_time, 99
         )
-
-        dialog_box.setInputMode(QInputDialog.IntInput)
-        dialog_box.setIntRange(1, 99)
-        dialog_box.setIntValue(self.goal_time)
-        dialog_box.setLabelText("Enter goal hours:")
-        dialog_box.setWindowTitle("Goal Hours Setting")
-
-        if dialog_box.exec() == QInputDialog.Accepted:
-            new_goal_time: int = dialog_box.intValue()
+        if new_goal_time is not None:
             self.goal_time: int = new_goal_time
+            self.update_goal_time_reached()
             self.config["OPTIONS"]["goal_time"] = str(new_goal_time)
+            self.mark_config_dirty()
 
     def is_self_focused(self) -> bool:
-        if self.isActiveWindow():
-            return True
-        else:
-            return any(widget.isActiveWindow() for widget in self.findChildren(QWidget))
+        # Walk up from the active window (e.g. one of this window's dialogs)
+        # instead of checking every child widget
+        widget: QWidget | None = QApplication.activeWindow()
+        while widget is not None:
+            if widget is self:
+                return True
+            widget = widget.parentWidget()
+        return False
+
+    def track_program(self, program: ActiveProgram) -> None:
+        # The config section (for saving) and the set (for lookups) are
+        # always updated together here
+        self.tracked_programs[program.exe] = program.name
+        self.tracked_exes.add(program.exe)
+        self.mark_config_dirty()
+        self.update_active_program_tracked()
+
+    def untrack_program(self, program: ActiveProgram) -> None:
+        self.config.remove_option("PROGRAMS", program.exe)
+        self.tracked_exes.discard(program.exe)
+        self.mark_config_dirty()
+        self.update_active_program_tracked()
 
     def add_program(self) -> None:
-        with QMutexLocker(self.lock):
-            current_program: psutil.Process | None = self.get_active_program()
-            if current_program is None or self.is_self_focused():
-                return
-            current_program_exe: str = current_program.exe()
-
-            if current_program_exe in self.tracked_programs:
-                self.label.setText("already+")
-            else:
-                self.tracked_programs[current_program_exe] = current_program.name()
-                self.change_background_color(self.active_color)
-                self.label.setText("added")
+        current_program: ActiveProgram | None = self.get_active_program()
+        if current_program is None or self.is_self_focused():
+            return
+
+        if current_program.exe in self.tracked_exes:
+            self.set_label_text("already+")
+        else:
+            self.track_program(current_program)
+            self.change_background_color(self.active_color)
+            self.set_label_text("added")
 
     def remove_program(self) -> None:
-        with QMutexLocker(self.lock):
-            current_program: psutil.Process | None = self.get_active_program()
-            if current_program is None or self.is_self_focused():
-                return
-            current_program_exe: str = current_program.exe()
-
-            if current_program_exe in self.tracked_programs:
-                self.config.remove_option("PROGRAMS", current_program_exe)
-                self.change_background_color(self.inactive_color)
-                self.label.setText("removed")
-            else:
-                self.label.setText("already-")
+        current_program: ActiveProgram | None = self.get_active_program()
+        if current_program is None or self.is_self_focused():
+            return
+
+        if current_program.exe in self.tracked_exes:
+            self.untrack_program(current_program)
+            self.change_background_color(self.inactive_color)
+            self.set_label_text("removed")
+        else:
+            self.set_label_text("already-")
 
     def add_program_mouse(self) -> None:
-        self.wait_to_add_program = True
+        self.pending_action = self.add_program
         # Click then handled by eventFilter ...
 
-        self.label.setText("add prog")
+        self.set_label_text("add prog")
 
     def remove_program_mouse(self) -> None:
-        self.wait_to_remove_program = True
+        self.pending_action = self.remove_program
         # Click then handled by eventFilter ...
 
-        self.label.setText("rem prog")
+        self.set_label_text("rem prog")
 
     def resume_previous_time(self) -> None:
         previous_time: list[str] = self.config["OPTIONS"]["previous_time"].split(":")
-        self.hours: int = int(previous_time[0])
-        self.minutes: int = int(previous_time[1])
-        self.seconds: int = int(previous_time[2])
+        self.set_tracked_seconds(
+            int(previous_time[0]) * 3600
+            + int(previous_time[1]) * 60
+            + int(previous_time[2])
+        )
+        self.update_goal_time_reached()
         self.update_time_display()
 
     def reset_time(self) -> None:
         self.save_data()
-        self.hours: int = 0
-        self.minutes: int = 0
-        self.seconds: int = 0
+        self.set_tracked_seconds(0)
+        self.update_goal_time_reached()
         self.update_time_display()
 
     def show_alert(self, message):
-        # Create the QMessageBox
-        alert = QMessageBox(self)
-        alert.setWindowTitle("Alert")
+        # Create the QMessageBox once and reuse it
+        if self.alert is None:
+            self.alert = QMessageBox(self)
+            self.alert.setWindowTitle("Alert")
+            self.alert.setIcon(QMessageBox.Warning)
+            # Shown without exec_(), so the ticks (and the time) keep going
+            # while the alert is open
+            self.alert.setModal(False)
+        alert: QMessageBox = self.alert
         alert.setText(message)
-        alert.setIcon(QMessageBox.Warning)
 
         # Calculate the center position
         screen_geometry = QCoreApplication.instance().primaryScreen().geometry()
@@ -509,46 +890,62 @@ class MainWindow(QMainWindow):
         alert.move(screen_center - alert.rect().center())
 
         # Display the QMessageBox
-        alert.exec_()
+        alert.show()
 
     def toggle_idle_sound(self) -> None:
         self.play_sound_on_idle: bool = not self.play_sound_on_idle
         self.config["OPTIONS"]["play_sound_on_idle"] = str(self.play_sound_on_idle)
+        self.mark_config_dirty()
 
         if self.play_sound_on_idle:
-            self.label.setText("snd on")
+            # Give the sound another try after an earlier failure
+            self.sound_ok = True
+            self.set_label_text("snd on")
         else:
-            self.label.setText("snd off")
+            self.set_label_text("snd off")
 
     def checkbox_was_toggled(self, checked: bool) -> None:
+        if checked == self.hide_time:
+            return
         self.hide_time: bool = checked
         self.config["OPTIONS"]["hide_time"] = str(self.hide_time)
-        self.update_time_display()
+        self.mark_config_dirty()
+        # current_time is kept up to date by the tick, so just swap the text
+        self.set_label_text(HIDDEN_TIME if checked else self.current_time)
 
     def click_handler(self) -> None:
-        if self.wait_to_add_program is True:
-            self.add_program()
-        elif self.wait_to_remove_program is True:
-            self.remove_program()
-
-        self.wait_to_add_program = False
-        self.wait_to_remove_program = False
+        action: Callable[[], None] | None = self.pending_action
+        self.pending_action = None
+        if action is not None:
+            action()
 
     def eventFilter(self, a0: QObject, a1: QEvent) -> bool:
         source = a0
         event = a1
 
-        if event.type() == QEvent.WindowDeactivate:
+        # Every event for the container passes through here, so only the
+        # two interesting types are looked at and nothing else is forwarded
+        event_type: QEvent.Type = event.type()
+        if event_type == QEvent.WindowDeactivate:
             self.click_handler()
+        elif event_type == QEvent.KeyPress and event.key() == Qt.Key_Escape:
+            self.pending_action = None
 
-        if isinstance(event, QKeyEvent) and event.key() == Qt.Key_Escape:
-            self.wait_to_add_program = False
-            self.wait_to_remove_program = False
+        return False
 
-        return super().eventFilter(source, event)
+    def changeEvent(self, a0: QEvent) -> None:
+        event = a0
+        if event.type() == QEvent.WindowStateChange:
+            self.update_timer_state()
+            if event.oldState() & Qt.WindowMinimized and not self.isMinimized():
+                self.update_time_display()
+        super().changeEvent(event)
 
     def closeEvent(self, a0: QEvent):
         event = a0
+        if self.foreground_hook:
+            windll.user32.UnhookWinEvent(self.foreground_hook)
+            self.foreground_hook = None
         self.save_data()
 
 